@@ -6,13 +6,14 @@ Run this file to start the web application.
 """
 
 import os
-from dotenv import load_dotenv
+import shutil
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Import the Flask app from backend
-from backend.api import app
+# Load environment variables from .env file, except in production where the
+# real environment is configured directly
+env_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+if os.getenv('FLASK_ENV') != 'production' and os.path.isfile(env_file):
+    from dotenv import load_dotenv
+    load_dotenv(env_file)
 
 if __name__ == '__main__':
     # Check if API key is set
@@ -29,19 +30,36 @@ if __name__ == '__main__':
         print("\nGet your API key from: https://makersuite.google.com/app/apikey")
         print("=" * 70 + "\n")
 
+    port = int(os.getenv('PORT', '4000'))
+
     print("\n" + "=" * 70)
     print("Story to Comic Strip Generator - Web Application")
     print("=" * 70)
     print("\nStarting server...")
     print("\nAccess the application at:")
-    print("  Local:   http://localhost:5000")
-    print("  Network: http://0.0.0.0:5000")
+    print(f"  Local:   http://localhost:{port}")
+    print(f"  Network: http://0.0.0.0:{port}")
     print("\nPress CTRL+C to stop the server.")
     print("=" * 70 + "\n")
 
+    # Outside development, serve the app from a gunicorn worker pool so
+    # requests waiting on the Gemini API don't block each other
+    if os.getenv('FLASK_ENV') != 'development' and shutil.which('gunicorn'):
+        os.execvp('gunicorn', [
+            'gunicorn',
+            '-w', str(os.cpu_count() or 1),
+            '--threads', '8',
+            '-b', f'0.0.0.0:{port}',
+            'backend.api:app'
+        ])
+
+    # Import the Flask app only when serving it here, so the gunicorn parent
+    # above doesn't build a generator and its threads just to exec away
+    from backend.api import app
+
     # Run the Flask application
     app.run(
-        debug=True,
+        debug=os.getenv('FLASK_DEBUG') == '1',
         host='0.0.0.0',
-        port=4000
+        port=port
     )
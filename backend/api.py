@@ -4,35 +4,205 @@ Backend API for Story to Comic Strip Generator
 This module provides REST API endpoints for the comic generation service.
 """
 
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, render_template, stream_with_context
 from flask_cors import CORS
+from flask_compress import Compress
+from werkzeug.exceptions import HTTPException
+import concurrent.futures
+import hashlib
 import os
-import sys
+import threading
 
-# Add parent directory to path to import story_to_comic module
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from story_to_comic import StoryToComicGenerator
+import orjson
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from pydantic_core import PydanticCustomError
+
+from story_to_comic import LRUCache, StoryToComicGenerator
+
+# Load the project .env file unless running in production
+_env_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env')
+if os.getenv('FLASK_ENV') != 'production' and os.path.isfile(_env_file):
+    from dotenv import load_dotenv
+    load_dotenv(_env_file)
+
+# The API key does not change while the server runs, so only look it up once
+_API_KEY_CONFIGURED = bool(os.getenv('GEMINI_API_KEY'))
+
+# Largest request body accepted by /api/generate, in bytes
+MAX_STORY_BYTES = int(os.getenv('MAX_STORY_BYTES', '100000'))
+
+
+def _error_body(message):
+    """Serialize the JSON body of an error response."""
+    return orjson.dumps({
+        'success': False,
+        'error': message
+    })
+
+
+# Bodies of responses that never change, serialized once at import
+_HEALTH_BODY = orjson.dumps({
+    'status': 'healthy',
+    'service': 'Story to Comic Strip Generator'
+})
+
+_CONFIG_BODY = orjson.dumps({
+    'api_key_configured': _API_KEY_CONFIGURED,
+    'max_panels_limit': 20,
+    'min_story_length': 10
+})
+
+_ERR_NO_JSON = _error_body('No JSON data provided')
+_ERR_INVALID_JSON = _error_body('Invalid JSON data')
+_ERR_TOO_LARGE = _error_body(f'Request is too large. The limit is {MAX_STORY_BYTES} bytes.')
+_ERR_STORY_REQUIRED = _error_body('Story text is required')
+_ERR_STORY_SHORT = _error_body('Story is too short. Please provide a longer story.')
+_ERR_BAD_PANELS = _error_body('max_panels must be an integer between 1 and 20')
+_ERR_NOT_FOUND = _error_body('Endpoint not found')
+_ERR_SERVER = _error_body('Internal server error')
 
 app = Flask(__name__,
             static_folder='../frontend/static',
             template_folder='../frontend/templates')
 CORS(app)
+app.config['MAX_CONTENT_LENGTH'] = MAX_STORY_BYTES
+
+# Compress JSON responses, but leave streamed panels alone so they reach the
+# client as soon as each one is ready
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
+
+
+class AppError(Exception):
+    """An error that should be returned to the client as a JSON error response."""
+
+    def __init__(self, message, status=400, body=None):
+        """
+        Args:
+            message: Error message for the response body
+            status: HTTP status code of the response
+            body: Optional pre-serialized response body to return instead
+        """
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.body = body
+
+
+class GenerateRequest(BaseModel):
+    """Validated body of a /api/generate request."""
+
+    story: str = Field(min_length=10)
+    max_panels: int = Field(default=10, ge=1, le=20, strict=True)
+
+    @field_validator('story')
+    @classmethod
+    def _strip_story(cls, story):
+        """Strip the story once it has passed the raw length check."""
+        story = story.strip()
+        if not story:
+            raise PydanticCustomError('story_blank', 'Story text is required')
+        if len(story) < 10:
+            raise PydanticCustomError('story_too_short', 'Story is too short')
+        return story
+
 
-# Initialize the generator (will be lazy-loaded when needed)
-generator = None
+def _validation_error_body(error):
+    """Pick the error body for a GenerateRequest validation error."""
+    details = error.errors()[0]
+    field = details['loc'][0] if details['loc'] else None
+
+    if field == 'story':
+        if details['type'] == 'story_too_short':
+            return _ERR_STORY_SHORT
+        if details['type'] == 'string_too_short' and str(details.get('input', '')).strip():
+            return _ERR_STORY_SHORT
+        return _ERR_STORY_REQUIRED
+
+    if field == 'max_panels':
+        return _ERR_BAD_PANELS
+
+    if details['type'] == 'json_invalid':
+        return _ERR_INVALID_JSON
+
+    return _ERR_NO_JSON
+
+
+def _json_response(obj, status=200):
+    """Serialize obj with orjson into a JSON response."""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+
+def _error_response(body, status):
+    """Wrap a pre-serialized error body in a JSON response."""
+    return Response(body, status=status, mimetype='application/json')
+
+
+_generator = None
+_generator_lock = threading.Lock()
 
 
 def get_generator():
-    """Lazy initialization of the comic generator."""
-    global generator
+    """Return the shared comic generator, creating it exactly once."""
+    global _generator
+
+    generator = _generator
     if generator is None:
-        try:
-            generator = StoryToComicGenerator()
-        except ValueError as e:
-            raise ValueError(f"Failed to initialize generator: {str(e)}")
+        # Concurrent first callers wait here for a single generator to be built
+        with _generator_lock:
+            if _generator is None:
+                try:
+                    _generator = StoryToComicGenerator()
+                except ValueError as e:
+                    raise ValueError(f"Failed to initialize generator: {str(e)}")
+            generator = _generator
+
     return generator
 
 
+# How long a request waits for its comic before giving up, in seconds
+GENERATE_TIMEOUT_S = float(os.getenv('GENERATE_TIMEOUT_S', '300'))
+
+
+def generate_panels(story, max_panels):
+    """
+    Generate a comic and wait for its panel dictionaries.
+
+    Concurrent requests each start their own generation on the shared
+    generator, so their comics and images are produced at the same time.
+
+    Returns:
+        Tuple of (panel dictionaries, whether every panel got a generated image
+        rather than a placeholder)
+
+    Raises:
+        TimeoutError: If the comic is not ready within GENERATE_TIMEOUT_S
+    """
+    future = get_generator().submit_comic(story, max_panels)
+    try:
+        panels = future.result(GENERATE_TIMEOUT_S)
+    except concurrent.futures.TimeoutError:
+        # Stop the generation so it does not keep using the image quota
+        future.cancel()
+        raise TimeoutError(f'No result after {GENERATE_TIMEOUT_S:g} seconds')
+
+    panels_data = [panel.to_dict() for panel in panels]
+    complete = not any(panel.image_is_placeholder for panel in panels)
+    return panels_data, complete
+
+
+# Response cache: identical stories are served from memory instead of
+# regenerating the comic. Each entry holds the serialized response body.
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '64'))
+
+_response_cache = LRUCache(RESPONSE_CACHE_SIZE)
+
+
+def _response_cache_key(story, max_panels):
+    """Build the cache key for a generation request."""
+    return hashlib.sha256(story.encode()).digest(), max_panels
+
+
 @app.route('/')
 def index():
     """Serve the main frontend page."""
@@ -42,10 +212,32 @@ def index():
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({
-        'status': 'healthy',
-        'service': 'Story to Comic Strip Generator'
-    })
+    return Response(_HEALTH_BODY, mimetype='application/json')
+
+
+def _parse_generate_request():
+    """
+    Parse and validate the body of a comic generation request.
+
+    Returns:
+        The validated GenerateRequest
+
+    Raises:
+        AppError: If the request body is missing, too large or invalid
+    """
+    # Reject oversized payloads before reading the body
+    if request.content_length and request.content_length > MAX_STORY_BYTES:
+        raise AppError('Request is too large', 413, _ERR_TOO_LARGE)
+
+    # Parse and validate the request in one step
+    body = request.get_data()
+    if not body:
+        raise AppError('No JSON data provided', body=_ERR_NO_JSON)
+
+    try:
+        return GenerateRequest.model_validate_json(body)
+    except ValidationError as e:
+        raise AppError(str(e), body=_validation_error_body(e))
 
 
 @app.route('/api/generate', methods=['POST'])
@@ -73,98 +265,118 @@ def generate_comic():
         ]
     }
     """
-    try:
-        # Get request data
-        data = request.get_json()
+    generate_request = _parse_generate_request()
+    story = generate_request.story
+    max_panels = generate_request.max_panels
 
-        if not data:
-            return jsonify({
-                'success': False,
-                'error': 'No JSON data provided'
-            }), 400
+    # Generate comic, reusing the response for a story we've seen before
+    cache_key = _response_cache_key(story, max_panels)
+    body = _response_cache.get(cache_key)
 
-        story = data.get('story', '').strip()
-        max_panels = data.get('max_panels', 10)
+    if body is None:
+        try:
+            panels_data, complete = generate_panels(story, max_panels)
+        except Exception as e:
+            raise AppError(f'Failed to generate comic: {str(e)}', 500)
 
-        # Validate input
-        if not story:
-            return jsonify({
-                'success': False,
-                'error': 'Story text is required'
-            }), 400
+        body = orjson.dumps({
+            'success': True,
+            'panels': panels_data,
+            'total_panels': len(panels_data)
+        })
 
-        if len(story) < 10:
-            return jsonify({
-                'success': False,
-                'error': 'Story is too short. Please provide a longer story.'
-            }), 400
-
-        if not isinstance(max_panels, int) or max_panels < 1 or max_panels > 20:
-            return jsonify({
-                'success': False,
-                'error': 'max_panels must be an integer between 1 and 20'
-            }), 400
-
-        # Generate comic
-        try:
-            gen = get_generator()
-            panels = gen.generate_comic(story, max_panels)
+        # A comic with placeholder images (e.g. after a rate limit) is not
+        # cached, so that a retry can get the real images
+        if complete:
+            _response_cache.put(cache_key, body)
 
-            # Convert panels to dictionary format
-            panels_data = [panel.to_dict() for panel in panels]
+    return Response(body, mimetype='application/json')
 
-            return jsonify({
-                'success': True,
-                'panels': panels_data,
-                'total_panels': len(panels_data)
-            })
 
-        except Exception as e:
-            return jsonify({
-                'success': False,
-                'error': f'Failed to generate comic: {str(e)}'
-            }), 500
+@app.route('/api/generate/stream', methods=['POST'])
+def generate_comic_stream():
+    """
+    Generate comic strip from story, streaming each panel as soon as it is ready.
+
+    Takes the same request JSON as /api/generate. The response is newline-delimited
+    JSON with one panel object per line. If generation fails part way through, the
+    last line is {"success": false, "error": "..."}.
+    """
+    generate_request = _parse_generate_request()
+
+    try:
+        gen = get_generator()
+    except ValueError as e:
+        raise AppError(f'Failed to generate comic: {str(e)}', 500)
 
+    panels = gen.stream_comic(generate_request.story, generate_request.max_panels)
+    return Response(stream_with_context(_ndjson_iter(panels)), mimetype='application/x-ndjson')
+
+
+def _ndjson_iter(panels):
+    """Serialize panels as newline-delimited JSON, ending with an error line on failure."""
+    try:
+        for panel in panels:
+            yield orjson.dumps(panel) + b'\n'
     except Exception as e:
-        return jsonify({
+        yield orjson.dumps({
             'success': False,
-            'error': f'Server error: {str(e)}'
-        }), 500
+            'error': str(e)
+        }) + b'\n'
 
 
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """Get configuration status."""
-    api_key_set = bool(os.getenv('GEMINI_API_KEY'))
+    return Response(_CONFIG_BODY, mimetype='application/json')
 
-    return jsonify({
-        'api_key_configured': api_key_set,
-        'max_panels_limit': 20,
-        'min_story_length': 10
-    })
+
+@app.route('/api/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Get response cache statistics."""
+    return _json_response(_response_cache.stats())
+
+
+@app.errorhandler(AppError)
+def app_error(e):
+    """Handle errors raised by the API endpoints."""
+    return _error_response(e.body or _error_body(e.message), e.status)
+
+
+@app.errorhandler(HTTPException)
+def http_error(e):
+    """Handle HTTP errors that have no dedicated handler."""
+    return _error_response(_error_body(e.description), e.code)
+
+
+@app.errorhandler(413)
+def request_too_large(e):
+    """Handle request bodies over MAX_CONTENT_LENGTH."""
+    return _error_response(_ERR_TOO_LARGE, 413)
 
 
 @app.errorhandler(404)
 def not_found(e):
     """Handle 404 errors."""
-    return jsonify({
-        'success': False,
-        'error': 'Endpoint not found'
-    }), 404
+    return _error_response(_ERR_NOT_FOUND, 404)
 
 
 @app.errorhandler(500)
 def server_error(e):
     """Handle 500 errors."""
-    return jsonify({
-        'success': False,
-        'error': 'Internal server error'
-    }), 500
+    return _error_response(_ERR_SERVER, 500)
+
+
+# Warm the generator at startup so the first request doesn't pay for client setup
+try:
+    get_generator()
+except ValueError:
+    pass
 
 
 if __name__ == '__main__':
     # Check if API key is set
-    if not os.getenv('GEMINI_API_KEY'):
+    if not _API_KEY_CONFIGURED:
         print("\n" + "=" * 70)
         print("WARNING: GEMINI_API_KEY environment variable is not set!")
         print("=" * 70)
@@ -175,8 +387,10 @@ if __name__ == '__main__':
         print("\nGet your API key from: https://makersuite.google.com/app/apikey")
         print("=" * 70 + "\n")
 
+    port = int(os.getenv('PORT', '5000'))
+
     print("\nStarting Story to Comic Strip Generator Web Server...")
-    print("Access the application at: http://localhost:5000")
+    print(f"Access the application at: http://localhost:{port}")
     print("\nPress CTRL+C to stop the server.\n")
 
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(debug=os.getenv('FLASK_DEBUG') == '1', host='0.0.0.0', port=port)
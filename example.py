@@ -6,11 +6,46 @@ stories into comic strip format.
 """
 
 from story_to_comic import StoryToComicGenerator, story_to_comic
-from dotenv import load_dotenv
 import os
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file, if there is one
+env_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+if os.getenv('FLASK_ENV') != 'production' and os.path.isfile(env_file):
+    from dotenv import load_dotenv
+    load_dotenv(env_file)
+
+# Example stories used throughout this script
+KNIGHT_STORY = """
+    Once upon a time, there was a brave knight named Sir Arthur who embarked on a quest to save the kingdom from a fearsome dragon.
+    "I must find the dragon's lair," said Sir Arthur as he prepared his sword and shield.
+    The journey was long and treacherous. He traveled through dark forests and crossed raging rivers.
+    After many days, Sir Arthur finally reached the mountain where the dragon lived.
+    "At last, I've found it!" he exclaimed, looking up at the smoking cave entrance.
+    The dragon emerged with a mighty roar. "Who dares enter my domain?" it bellowed.
+    "I am Sir Arthur, and I've come to free the kingdom from your terror!" the knight replied bravely.
+    After a fierce battle, Sir Arthur discovered the dragon was only angry because a thorn was stuck in its foot.
+    "Let me help you," said Sir Arthur, and he carefully removed the thorn.
+    "Thank you, kind knight," said the dragon. "I will trouble the kingdom no more."
+    And so, Sir Arthur returned home as a hero, having won not through violence, but through compassion.
+"""
+
+LUNA_STORY = """
+    In a small village lived a curious girl named Luna who loved to explore.
+    One day, she discovered a mysterious glowing door in the old library.
+    "What could be behind this?" Luna wondered as she slowly pushed it open.
+    Behind the door was a magical garden filled with talking flowers and singing birds.
+    "Welcome, Luna!" said a wise old oak tree. "We've been waiting for you."
+    Luna spent the day learning about the magic of nature and friendship.
+    When evening came, she returned home, knowing she had found something special.
+"""
+
+DETECTIVE_STORY = """
+    Detective Sarah Chen examined the crime scene carefully.
+    "The window was broken from the inside," she noted.
+    Her partner, Detective Mike Rodriguez, found a mysterious letter.
+    "Sarah, you need to see this," he said urgently.
+    The letter contained a cryptic message that would change everything.
+"""
 
 
 def example_1_basic_usage():
@@ -24,19 +59,7 @@ def example_1_basic_usage():
         generator = StoryToComicGenerator()
 
         # Your story
-        story = """
-        Once upon a time, there was a brave knight named Sir Arthur who embarked on a quest to save the kingdom from a fearsome dragon.
-        "I must find the dragon's lair," said Sir Arthur as he prepared his sword and shield.
-        The journey was long and treacherous. He traveled through dark forests and crossed raging rivers.
-        After many days, Sir Arthur finally reached the mountain where the dragon lived.
-        "At last, I've found it!" he exclaimed, looking up at the smoking cave entrance.
-        The dragon emerged with a mighty roar. "Who dares enter my domain?" it bellowed.
-        "I am Sir Arthur, and I've come to free the kingdom from your terror!" the knight replied bravely.
-        After a fierce battle, Sir Arthur discovered the dragon was only angry because a thorn was stuck in its foot.
-        "Let me help you," said Sir Arthur, and he carefully removed the thorn.
-        "Thank you, kind knight," said the dragon. "I will trouble the kingdom no more."
-        And so, Sir Arthur returned home as a hero, having won not through violence, but through compassion.
-        """
+        story = KNIGHT_STORY
 
         # Generate comic strip
         print("Generating comic strip from story...\n")
@@ -58,15 +81,7 @@ def example_2_quick_function():
     print("EXAMPLE 2: Using Convenience Function")
     print("=" * 70 + "\n")
 
-    story = """
-    In a small village lived a curious girl named Luna who loved to explore.
-    One day, she discovered a mysterious glowing door in the old library.
-    "What could be behind this?" Luna wondered as she slowly pushed it open.
-    Behind the door was a magical garden filled with talking flowers and singing birds.
-    "Welcome, Luna!" said a wise old oak tree. "We've been waiting for you."
-    Luna spent the day learning about the magic of nature and friendship.
-    When evening came, she returned home, knowing she had found something special.
-    """
+    story = LUNA_STORY
 
     try:
         result = story_to_comic(story, max_panels=5)
@@ -83,13 +98,7 @@ def example_3_detailed_output():
     print("EXAMPLE 3: Working with Panel Objects")
     print("=" * 70 + "\n")
 
-    story = """
-    Detective Sarah Chen examined the crime scene carefully.
-    "The window was broken from the inside," she noted.
-    Her partner, Detective Mike Rodriguez, found a mysterious letter.
-    "Sarah, you need to see this," he said urgently.
-    The letter contained a cryptic message that would change everything.
-    """
+    story = DETECTIVE_STORY
 
     try:
         generator = StoryToComicGenerator()
@@ -117,6 +126,32 @@ def example_3_detailed_output():
         print("\nPlease set your GEMINI_API_KEY environment variable.")
 
 
+def example_batch():
+    """Example 4: Generating several comics concurrently in one batch"""
+    print("\n" + "=" * 70)
+    print("EXAMPLE 4: Batch Generation")
+    print("=" * 70 + "\n")
+
+    stories = [KNIGHT_STORY, LUNA_STORY, DETECTIVE_STORY]
+
+    try:
+        generator = StoryToComicGenerator()
+
+        # Each story gets its own Gemini request, and the requests run concurrently
+        print(f"Generating {len(stories)} comic strips concurrently...\n")
+        results = generator.generate_comic_batch(stories, max_panels=[8, 5, 4])
+
+        for number, panels in enumerate(results, start=1):
+            print(f"\nComic {number} ({len(panels)} panels):\n")
+            for panel in panels:
+                print(panel)
+                print()
+
+    except ValueError as e:
+        print(f"Error: {e}")
+        print("\nPlease set your GEMINI_API_KEY environment variable.")
+
+
 def main():
     """Run all examples"""
     print("\n" + "=" * 70)
@@ -134,10 +169,10 @@ def main():
         print("\nGet your API key from: https://makersuite.google.com/app/apikey")
         return
 
-    # Run examples
-    example_1_basic_usage()
-    example_2_quick_function()
-    example_3_detailed_output()
+    # Run the examples as one concurrent batch. The single-story examples
+    # (example_1_basic_usage, example_2_quick_function, example_3_detailed_output)
+    # show the other ways to use the generator and can be run individually.
+    example_batch()
 
     print("\n" + "=" * 70)
     print("Examples completed!")
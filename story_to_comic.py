@@ -5,17 +5,223 @@ This module provides functionality to convert written stories into comic strip p
 using Google's Gemini API for intelligent story analysis and comic generation with images.
 """
 
+import asyncio
+import functools
+import hashlib
+import inspect
 import os
 import re
 import base64
+import threading
 import time
-from typing import List, Dict, Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Hashable, Iterator, List, Optional, Union
 from io import BytesIO
+import httpx
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from google import genai
 from google.genai import types
 
 
+# Patterns used to parse the Gemini response into panels
+# A PANEL marker at the start of a line, allowing Markdown emphasis or headings
+# around it as in "**PANEL 1**"
+_PANEL_MARKER_RE = re.compile(r'^[ \t#*]*PANEL\s+(\d+)', re.MULTILINE)
+
+# Separators between a PANEL marker and the text after it on the same line
+_MARKER_SEPARATORS = ' \t:.-*#'
+
+# Section headers inside a panel, matched case-insensitively at the start of a line
+_SECTION_HEADERS = ('SCENE:', 'IMAGE_PROMPT:', 'DIALOGUE:', 'NARRATION:')
+_SECTION_HEADER_LEN = max(len(header) for header in _SECTION_HEADERS)
+
+# Characters that mark a dialogue line
+_BULLETS = frozenset('-*')
+
+# Placeholder image background colors at the top and bottom rows
+_GRADIENT_TOP = np.array([102, 126, 241], dtype=np.float64)
+_GRADIENT_BOTTOM = np.array([118, 187, 162], dtype=np.float64)
+
+# How much already-scanned text to re-check for a PANEL marker split across chunks
+_PANEL_MARKER_OVERLAP = 32
+
+
+# Attributes on which SDK image objects may carry the raw image bytes
+_IMAGE_BYTES_ATTRS = ('content', 'image_bytes', 'data', 'bytes')
+
+# Buffer types that base64.b64encode accepts without a copy
+_BYTES_LIKE = (bytes, bytearray, memoryview)
+
+# Timeout for each Gemini API request, in milliseconds. The SDK passes it to
+# httpx on every request, overriding any timeout set on the httpx client.
+_REQUEST_TIMEOUT_MS = 60_000
+
+
+@functools.lru_cache(maxsize=None)
+def _save_accepts_format(image_type: type) -> bool:
+    """Check once per image class whether its save() method takes a format argument."""
+    try:
+        params = inspect.signature(image_type.save).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.name == 'format' or p.kind is p.VAR_KEYWORD for p in params)
+
+
+def _extract_image_bytes(img_obj) -> Union[bytes, bytearray, memoryview]:
+    """
+    Get the encoded image bytes from an SDK image payload.
+
+    The SDK may return different types for the image payload depending on the
+    SDK version or model: raw bytes, an object carrying the bytes on an
+    attribute such as 'image_bytes', or a PIL Image-like object with save().
+
+    Args:
+        img_obj: The image payload of a generated image
+
+    Returns:
+        The encoded image bytes, as a bytes-like object that is not copied
+
+    Raises:
+        Exception: If no image bytes can be found
+    """
+    if isinstance(img_obj, _BYTES_LIKE):
+        return img_obj
+
+    for attr in _IMAGE_BYTES_ATTRS:
+        val = getattr(img_obj, attr, None)
+        if isinstance(val, _BYTES_LIKE) and val:
+            return val
+
+    if hasattr(img_obj, 'save'):
+        img_io = BytesIO()
+        if _save_accepts_format(type(img_obj)):
+            img_obj.save(img_io, format='PNG')
+        else:
+            img_obj.save(img_io)
+        if img_io.tell():
+            return img_io.getbuffer()
+
+    raise Exception('Unable to extract image bytes from SDK response')
+
+
+def _is_billing_error(error: BaseException) -> bool:
+    """Check whether an Imagen error says the account needs billing enabled."""
+    error_msg = str(error).lower()
+    return "billed users" in error_msg or "billing" in error_msg
+
+
+class _ImagenUnavailableError(Exception):
+    """Raised instead of calling Imagen after it has reported that billing is required."""
+
+    def __init__(self):
+        super().__init__("Imagen API requires billing to be enabled")
+
+
+async def _anext_or_none(iterator: AsyncIterator) -> Optional[Any]:
+    """Return the next item of an async iterator, or None once it is exhausted."""
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+def _cache_key(*parts: str) -> bytes:
+    """Hash the parts of a request into a fixed-size cache key."""
+    return hashlib.sha256('\0'.join(parts).encode()).digest()
+
+
+class LRUCache:
+    """Small thread-safe in-memory cache that evicts the least recently used entry."""
+
+    def __init__(self, maxsize: int):
+        """
+        Args:
+            maxsize: Maximum number of entries kept (0 or less disables the cache)
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached entries."""
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit and miss counts, current size and maximum size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'max_size': self.maxsize
+            }
+
+
+class _PanelStreamBuffer:
+    """Collects streamed response text and hands back the panels that are complete."""
+
+    def __init__(self):
+        self._buffer = ''
+        self._scan_from = 0
+
+    def feed(self, text: str) -> str:
+        """
+        Add streamed text.
+
+        Args:
+            text: The next piece of the response text
+
+        Returns:
+            Text containing only complete panels, or an empty string if there is none yet
+        """
+        self._buffer += text
+
+        # Every panel before the last PANEL marker is complete. Only the text that
+        # arrived since the last call (plus a small overlap) needs to be scanned.
+        last_start = None
+        for match in _PANEL_MARKER_RE.finditer(self._buffer, self._scan_from):
+            if match.start() > 0:
+                last_start = match.start()
+
+        complete = ''
+        if last_start is not None:
+            complete = self._buffer[:last_start]
+            self._buffer = self._buffer[last_start:]
+
+        self._scan_from = max(0, len(self._buffer) - _PANEL_MARKER_OVERLAP)
+        return complete
+
+    def close(self) -> str:
+        """Return the remaining text once the stream has ended."""
+        remaining, self._buffer = self._buffer, ''
+        return remaining
+
+
 class ComicPanel:
     """Represents a single comic strip panel."""
 
@@ -40,20 +246,22 @@ class ComicPanel:
         self.image_prompt = image_prompt
         self.image_data = image_data
 
+        # Set when image generation failed and image_data holds a placeholder
+        self.image_is_placeholder = False
+
     def __str__(self) -> str:
         """Return a formatted string representation of the panel."""
-        output = f"Panel {self.panel_number}: [Scene: {self.scene}]\n"
+        lines = [f"Panel {self.panel_number}: [Scene: {self.scene}]"]
 
         if self.narration:
-            output += f"Narration: {self.narration}\n"
+            lines.append(f"Narration: {self.narration}")
 
-        for line in self.dialogue:
-            output += f"{line}\n"
+        lines.extend(self.dialogue)
 
         if self.image_prompt:
-            output += f"Image: Generated from prompt\n"
+            lines.append("Image: Generated from prompt")
 
-        return output.strip()
+        return '\n'.join(lines).strip()
 
     def to_dict(self) -> Dict:
         """Convert panel to dictionary format."""
@@ -70,7 +278,19 @@ class ComicPanel:
 class StoryToComicGenerator:
     """Main class for generating comic strips from stories using Google Gemini API with image generation."""
 
-    def __init__(self, api_key: Optional[str] = None, generate_images: bool = True):
+    # Placeholder image fonts, loaded once and shared by all generators
+    _font_large = None
+    _font_medium = None
+
+    # Measured (width, height) of each panel number drawn in the badge
+    _badge_text_sizes = {}
+
+    # Vertical spacing between lines of placeholder scene text, in pixels
+    _line_height = 18
+
+    def __init__(self, api_key: Optional[str] = None, generate_images: bool = True,
+                 max_concurrency: int = 8,
+                 cache_size: int = 32):
         """
         Initialize the Story to Comic Generator.
 
@@ -78,6 +298,10 @@ class StoryToComicGenerator:
             api_key: Google Gemini API key. If not provided, will try to read from
                     GEMINI_API_KEY environment variable.
             generate_images: Whether to generate images for panels (default: True)
+            max_concurrency: Maximum number of image generation requests in flight
+                            at once (default: 8)
+            cache_size: Number of comic texts and images kept in memory so repeated
+                       prompts skip the API call (default: 32, 0 disables caching)
 
         Raises:
             ValueError: If no API key is provided or found in environment.
@@ -91,15 +315,45 @@ class StoryToComicGenerator:
                 "GEMINI_API_KEY environment variable."
             )
 
+        # Under HTTP/2, concurrent requests to the API are multiplexed over a
+        # single connection, so the keep-alive limit only matters if the server
+        # falls back to HTTP/1.1. In that case keep one idle connection per
+        # concurrent image request plus the text stream, so a burst of panels
+        # reuses warm connections. The total is left unbounded so that requests
+        # never wait on the pool.
+        self._async_http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=max_concurrency + 1)
+        )
+
         # Configure the Gemini API using the new client
-        self.client = genai.Client(api_key=self.api_key)
+        http_options = types.HttpOptions(
+            timeout=_REQUEST_TIMEOUT_MS,
+            httpx_async_client=self._async_http
+        )
+        self.client = genai.Client(api_key=self.api_key, http_options=http_options)
         
         # For text generation, we'll use the client's models
         self.text_model_name = 'gemini-2.0-flash-exp'
         
         # Image generation model
         self.image_model_name = 'imagen-4.0-generate-001'
+        self.image_aspect_ratio = "1:1"  # Square format for comic panels
         self.image_generation_available = True
+        self.max_concurrency = max_concurrency
+
+        # Event loop thread for concurrent image requests, started on first use
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+        self._image_semaphore = None
+
+        # Image decoding and base64 encoding run here, off the event loop thread
+        self._encode_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='comic-image-encode')
+
+        # Responses for repeated prompts (retries, re-renders, shared scenes)
+        self._text_cache = LRUCache(cache_size)
+        self._image_cache = LRUCache(cache_size)
 
     def generate_comic(self, story: str, max_panels: int = 10) -> List[ComicPanel]:
         """
@@ -115,27 +369,188 @@ class StoryToComicGenerator:
         Raises:
             Exception: If the API call fails or response cannot be parsed
         """
+        try:
+            return self._run_async(self._agenerate_comic(story, max_panels))
+
+        except Exception as e:
+            raise Exception(f"Failed to generate comic: {str(e)}")
+
+    def submit_comic(self, story: str, max_panels: int = 10) -> Future:
+        """
+        Start generating a comic without waiting for it.
+
+        Args:
+            story: The story text to convert into comic panels
+            max_panels: Maximum number of panels to generate (default: 10)
+
+        Returns:
+            A concurrent.futures.Future that resolves to the list of ComicPanel
+            objects, or raises the error that stopped generation
+        """
+        return self._submit_async(self._agenerate_comic(story, max_panels))
+
+    async def _agenerate_comic(self, story: str, max_panels: int) -> List[ComicPanel]:
+        """
+        Generate comic strip panels with images on the generator's event loop.
+
+        Args:
+            story: The story text to convert into comic panels
+            max_panels: Maximum number of panels to generate
+
+        Returns:
+            List of ComicPanel objects representing the comic strip with images
+        """
+        return [panel async for panel in self._aiter_comic(story, max_panels)]
+
+    async def _aiter_comic(self, story: str, max_panels: int) -> AsyncIterator[ComicPanel]:
+        """
+        Stream the comic text from Gemini, starting each panel's image as soon as the panel is complete.
+
+        The text keeps streaming in the background while panels are handed out, so
+        reading the next panels never waits for an earlier panel's image.
+
+        Args:
+            story: The story text to convert into comic panels
+            max_panels: Maximum number of panels to generate
+
+        Yields:
+            ComicPanel objects with images, in order, each as soon as its image is ready
+        """
         # Create a detailed prompt for the Gemini API
         prompt = self._create_comic_generation_prompt(story, max_panels)
 
+        # (panel, image task) pairs in order, then None at the end of the text or
+        # the exception that stopped it
+        pending = asyncio.Queue()
+        image_tasks = []
+
+        def add_panels(section: str) -> None:
+            for panel in self._parse_comic_response(section, include_image_prompt=self.generate_images):
+                task = None
+                if self.generate_images:
+                    print(f"  Generating image for panel {panel.panel_number}...")
+                    task = asyncio.create_task(self._agenerate_image_with_imagen(panel.image_prompt))
+                    image_tasks.append(task)
+                pending.put_nowait((panel, task))
+
+        async def read_panels() -> None:
+            sections = _PanelStreamBuffer()
+            try:
+                # Generate content using Gemini
+                async for text in self._astream_text(prompt):
+                    add_panels(sections.feed(text))
+                add_panels(sections.close())
+                pending.put_nowait(None)
+            except Exception as e:
+                pending.put_nowait(e)
+
+        reader = asyncio.create_task(read_panels())
+        billing_warning_shown = False
+
         try:
-            # Generate content using Gemini
-            response = self.client.models.generate_content(
-                model=self.text_model_name,
-                contents=prompt
-            )
+            while True:
+                item = await pending.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                panel, task = item
+                if task is not None:
+                    try:
+                        panel.image_data = await task
+                    except Exception as e:
+                        billing_warning_shown = await self._ause_placeholder_image(panel, e, billing_warning_shown)
 
-            # Parse the response into comic panels
-            panels = self._parse_comic_response(response.text)
+                yield panel
 
-            # Generate images for each panel if enabled
-            if self.generate_images:
-                panels = self._generate_panel_images(panels)
+        finally:
+            # Stop the text stream and any images nobody will wait for
+            reader.cancel()
+            for task in image_tasks:
+                task.cancel()
 
-            return panels
+    def stream_comic(self, story: str, max_panels: int = 10) -> Iterator[Dict]:
+        """
+        Generate comic strip panels from a story, yielding each panel as soon as it is ready.
 
-        except Exception as e:
-            raise Exception(f"Failed to generate comic: {str(e)}")
+        Runs the same pipeline as generate_comic() on the generator's event loop, so
+        the text and the later panels' images keep generating while the caller
+        handles each panel.
+
+        Args:
+            story: The story text to convert into comic panels
+            max_panels: Maximum number of panels to generate (default: 10)
+
+        Yields:
+            Dictionaries representing comic panels, in order
+
+        Raises:
+            Exception: If the API call fails or response cannot be parsed
+        """
+        panels = self._aiter_comic(story, max_panels)
+
+        try:
+            while True:
+                try:
+                    panel = self._run_async(_anext_or_none(panels))
+                except Exception as e:
+                    raise Exception(f"Failed to generate comic: {str(e)}")
+
+                if panel is None:
+                    return
+                yield panel.to_dict()
+
+        finally:
+            # Also stops the remaining work if the caller stops reading early
+            self._run_async(panels.aclose())
+
+    def generate_comic_batch(self, stories: List[str],
+                             max_panels: Union[int, List[int]] = 10,
+                             return_exceptions: bool = False) -> List[Union[List[ComicPanel], Exception]]:
+        """
+        Generate comic strip panels for several stories concurrently.
+
+        Every story gets its own Gemini request, so stories never share a prompt
+        and one story failing does not affect the others. All requests and panel
+        images of the batch are in flight at the same time.
+
+        Args:
+            stories: The story texts to convert into comic panels
+            max_panels: Maximum number of panels per story, either one value for
+                       all stories or a list with one value per story (default: 10)
+            return_exceptions: If True, a story that fails gets its exception in
+                              its place in the results instead of failing the batch
+
+        Returns:
+            A list with one list of ComicPanel objects (or exception) per story, in input order
+
+        Raises:
+            ValueError: If the number of max_panels values does not match the stories
+            Exception: If a story fails and return_exceptions is False
+        """
+        if isinstance(max_panels, int):
+            max_panels = [max_panels] * len(stories)
+
+        if len(max_panels) != len(stories):
+            raise ValueError("max_panels must provide one value per story")
+
+        if not stories:
+            return []
+
+        futures = [self.submit_comic(story, story_max_panels)
+                   for story, story_max_panels in zip(stories, max_panels)]
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    raise Exception(f"Failed to generate comic: {str(e)}")
+                results.append(e)
+
+        return results
 
     def _create_comic_generation_prompt(self, story: str, max_panels: int) -> str:
         """Create a detailed prompt for the Gemini API."""
@@ -171,122 +586,187 @@ Please create engaging, visually descriptive comic panels that capture the key m
 
         return prompt
 
-    def _parse_comic_response(self, response_text: str) -> List[ComicPanel]:
+    async def _astream_text(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Stream the Gemini response text for a prompt via the async client, serving
+        repeated prompts from the cache.
+
+        Args:
+            prompt: The text generation prompt
+
+        Yields:
+            Pieces of the response text as they arrive
+        """
+        key = _cache_key(self.text_model_name, prompt)
+        cached = self._text_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        stream = await self.client.aio.models.generate_content_stream(
+            model=self.text_model_name,
+            contents=prompt
+        )
+        async for chunk in stream:
+            text = chunk.text or ''
+            parts.append(text)
+            yield text
+
+        # Only a fully received response is cached
+        self._text_cache.put(key, ''.join(parts))
+
+    def _parse_comic_response(self, response_text: str,
+                              include_image_prompt: bool = True) -> List[ComicPanel]:
         """
         Parse the Gemini API response into ComicPanel objects.
 
         Args:
             response_text: The raw text response from Gemini API
+            include_image_prompt: Whether to extract image prompts, which are only
+                                 needed when images are generated (default: True)
 
         Returns:
             List of ComicPanel objects
         """
-        panels = []
-
-        # Split response into individual panels
-        panel_sections = re.split(r'PANEL\s+(\d+)', response_text)
-
-        # Skip the first element (text before first panel)
-        for i in range(1, len(panel_sections), 2):
-            if i + 1 >= len(panel_sections):
-                break
-
-            panel_num = int(panel_sections[i])
-            panel_content = panel_sections[i + 1]
+        return list(self._parse_stream(response_text, include_image_prompt))
 
-            # Extract scene
-            scene_match = re.search(r'SCENE:\s*(.+?)(?:\n|$)', panel_content, re.IGNORECASE)
-            scene = scene_match.group(1).strip() if scene_match else "Unknown scene"
-
-            # Extract image prompt
-            image_prompt_match = re.search(
-                r'IMAGE_PROMPT:\s*(.+?)(?=DIALOGUE:|NARRATION:|PANEL|\Z)',
-                panel_content,
-                re.IGNORECASE | re.DOTALL
-            )
-            image_prompt = image_prompt_match.group(1).strip() if image_prompt_match else scene
-
-            # Extract dialogues
-            dialogue_section = re.search(
-                r'DIALOGUE:\s*(.+?)(?=NARRATION:|PANEL|\Z)',
-                panel_content,
-                re.IGNORECASE | re.DOTALL
-            )
-
-            dialogues = []
-            if dialogue_section:
-                dialogue_lines = dialogue_section.group(1).strip().split('\n')
-                for line in dialogue_lines:
-                    line = line.strip()
-                    if line and (line.startswith('-') or line.startswith('*')):
-                        # Remove leading dash/asterisk and clean up
-                        dialogue = line[1:].strip()
-                        if dialogue:
-                            dialogues.append(dialogue)
-
-            # Extract narration
-            narration_match = re.search(r'NARRATION:\s*(.+?)(?:\n|PANEL|\Z)', panel_content, re.IGNORECASE)
-            narration = narration_match.group(1).strip() if narration_match else None
-
-            # Create panel object
-            panel = ComicPanel(
-                panel_number=panel_num,
-                scene=scene,
-                dialogue=dialogues,
-                narration=narration,
-                image_prompt=image_prompt
-            )
+    def _parse_stream(self, response_text: str,
+                      include_image_prompt: bool = True) -> Iterator[ComicPanel]:
+        """
+        Parse the Gemini API response in a single pass over its lines.
 
-            panels.append(panel)
+        Each PANEL marker starts a new panel, and each section header switches
+        which of the panel's sections the following lines belong to.
 
-        return panels
+        Args:
+            response_text: The raw text response from Gemini API
+            include_image_prompt: Whether to extract image prompts; if not, their
+                                 lines are skipped and image_prompt is None
 
-    def _generate_panel_images(self, panels: List[ComicPanel]) -> List[ComicPanel]:
+        Yields:
+            ComicPanel objects, in order
+        """
+        panel_num = None
+        sections = {}
+        current = None
+
+        for line in response_text.split('\n'):
+            panel_match = _PANEL_MARKER_RE.match(line)
+            if panel_match:
+                if panel_num is not None:
+                    yield self._panel_from_sections(panel_num, sections, include_image_prompt)
+                panel_num = int(panel_match.group(1))
+                sections = {}
+                current = None
+
+                # The rest of the marker line may already hold a section, as in
+                # "PANEL 1: SCENE: A knight on a hill"
+                line = line[panel_match.end():].strip().lstrip(_MARKER_SEPARATORS)
+                if not line:
+                    continue
+
+            # Skip the text before the first panel
+            if panel_num is None:
+                continue
+
+            # Ignore Markdown emphasis or headings before headers, as in "## SCENE:"
+            key = line.strip().lstrip('#*').lstrip()
+
+            header = key[:_SECTION_HEADER_LEN].upper()
+            for name in _SECTION_HEADERS:
+                if header.startswith(name):
+                    # Only the first occurrence of each section counts
+                    if name in sections or (name == 'IMAGE_PROMPT:' and not include_image_prompt):
+                        current = None
+                    else:
+                        current = sections[name] = []
+                    # Drop the emphasis that closes a header, as in "**SCENE:**"
+                    line = key[len(name):].lstrip('*')
+                    break
+
+            if current is not None:
+                current.append(line)
+
+        if panel_num is not None:
+            yield self._panel_from_sections(panel_num, sections, include_image_prompt)
+
+    @staticmethod
+    def _panel_from_sections(panel_num: int, sections: Dict[str, List[str]],
+                             include_image_prompt: bool = True) -> ComicPanel:
         """
-        Generate images for all comic panels.
+        Build a ComicPanel from the lines collected for each section of a panel.
 
         Args:
-            panels: List of ComicPanel objects
+            panel_num: The panel number from the PANEL marker
+            sections: Lines following each section header, keyed by header
+            include_image_prompt: Whether to set the panel's image prompt
 
         Returns:
-            List of ComicPanel objects with image_data populated
+            The ComicPanel object
         """
-        if not self.generate_images:
-            return panels
-            
-        print(f"Generating images for {len(panels)} panels...")
-        
-        billing_warning_shown = False
-
-        for i, panel in enumerate(panels):
-            try:
-                print(f"  Generating image for panel {panel.panel_number}...")
+        # Scene and narration are the first non-empty line of their section
+        scene = next((line.strip() for line in sections.get('SCENE:', ()) if line.strip()), "Unknown scene")
+        narration = next((line.strip() for line in sections.get('NARRATION:', ()) if line.strip()), None)
+
+        # The image prompt may span several lines
+        image_prompt = None
+        if include_image_prompt:
+            image_prompt = '\n'.join(sections.get('IMAGE_PROMPT:', ())).strip() or scene
+
+        dialogues = []
+        for line in sections.get('DIALOGUE:', ()):
+            line = line.strip()
+            # An empty line gives '', which is not a bullet either
+            if line[:1] in _BULLETS:
+                # Remove leading dash/asterisk; the end is already stripped
+                dialogue = line[1:].lstrip()
+                if dialogue:
+                    dialogues.append(dialogue)
+
+        return ComicPanel(
+            panel_number=panel_num,
+            scene=scene,
+            dialogue=dialogues,
+            narration=narration,
+            image_prompt=image_prompt
+        )
+
+    async def _ause_placeholder_image(self, panel: ComicPanel, error: Exception,
+                                      billing_warning_shown: bool = False) -> bool:
+        """
+        Give a panel a placeholder image after its image generation failed.
 
-                # Use Imagen API to generate images
-                image_data = self._generate_image_with_imagen(panel.image_prompt)
-                panel.image_data = image_data
+        Args:
+            panel: The ComicPanel to populate with image_data
+            error: The exception raised while generating the image
+            billing_warning_shown: Whether the billing warning was already printed
 
-            except Exception as e:
-                error_msg = str(e)
-                
-                # Check if it's a billing error and only show the warning once
-                if ("billed users" in error_msg.lower() or "billing" in error_msg.lower()) and not billing_warning_shown:
-                    print(f"\n  {'=' * 66}")
-                    print(f"  NOTE: Imagen API requires a billing account to generate images.")
-                    print(f"  Creating high-quality placeholder images for all panels instead.")
-                    print(f"  {'=' * 66}\n")
-                    billing_warning_shown = True
-                elif not billing_warning_shown:
-                    print(f"  Warning: Failed to generate image for panel {panel.panel_number}: {e}")
-                
-                # Create placeholder if generation fails
-                panel.image_data = self._create_placeholder_image(panel)
-
-        return panels
-
-    def _generate_image_with_imagen(self, prompt: str) -> str:
-        """
-        Generate image using Imagen model via the new Google GenAI SDK.
+        Returns:
+            Whether the billing warning has been printed
+        """
+        # Check if it's a billing error and only show the warning once
+        if _is_billing_error(error) and not billing_warning_shown:
+            print(f"\n  {'=' * 66}")
+            print(f"  NOTE: Imagen API requires a billing account to generate images.")
+            print(f"  Creating high-quality placeholder images for all panels instead.")
+            print(f"  {'=' * 66}\n")
+            billing_warning_shown = True
+        elif not billing_warning_shown:
+            print(f"  Warning: Failed to generate image for panel {panel.panel_number}: {error}")
+
+        # Create placeholder if generation fails, rendering it in the pool so
+        # other comics on the event loop keep making progress
+        loop = asyncio.get_running_loop()
+        panel.image_data = await loop.run_in_executor(self._encode_pool,
+                                                      self._create_placeholder_image, panel)
+        panel.image_is_placeholder = True
+
+        return billing_warning_shown
+
+    async def _agenerate_image_with_imagen(self, prompt: str) -> str:
+        """
+        Generate image using Imagen model via the async Google GenAI client.
 
         Args:
             prompt: The image generation prompt
@@ -294,76 +774,169 @@ Please create engaging, visually descriptive comic panels that capture the key m
         Returns:
             Base64 encoded image data
         """
+        enhanced_prompt = self._enhance_image_prompt(prompt)
+        key = self._image_cache_key(enhanced_prompt)
+        cached = self._image_cache.get(key)
+        if cached is not None:
+            print(f"    ✓ Image loaded from cache")
+            return cached
+
+        self._check_image_generation_available()
+
+        # Created lazily so it belongs to the generator's event loop
+        if self._image_semaphore is None:
+            self._image_semaphore = asyncio.Semaphore(self.max_concurrency)
+
         try:
-            # Enhance the prompt for comic book style
-            enhanced_prompt = f"Comic book art style with bold outlines and vibrant colors. {prompt}"
-            
-            # Generate image using the new API
-            response = self.client.models.generate_images(
-                model=self.image_model_name,
-                prompt=enhanced_prompt,
-                config=types.GenerateImagesConfig(
-                    number_of_images=1,
-                    aspect_ratio="1:1",  # Square format for comic panels
+            async with self._image_semaphore:
+                # Another panel may have hit the billing error while this one waited
+                self._check_image_generation_available()
+                response = await self.client.aio.models.generate_images(
+                    model=self.image_model_name,
+                    prompt=enhanced_prompt,
+                    config=self._image_generation_config()
                 )
-            )
-            
-            if response.generated_images and len(response.generated_images) > 0:
-                # Get the first generated image
-                generated_image = response.generated_images[0]
-
-                # The SDK may return different types for the image payload depending
-                # on the SDK version or model. Handle common cases robustly:
-                # - bytes/bytearray
-                # - a PIL Image-like object with .save()
-                # - an object with raw bytes on attributes like 'content' or 'image_bytes'
-                img_bytes = None
-
-                # Case A: raw bytes
-                if isinstance(generated_image.image, (bytes, bytearray)):
-                    img_bytes = bytes(generated_image.image)
-
-                # Case B: object with a save() method (PIL Image or similar)
-                else:
-                    img_obj = generated_image.image
-                    # Try saving with explicit format first, then without
-                    try:
-                        img_io = BytesIO()
-                        # Some implementations accept format kw, others don't
-                        img_obj.save(img_io, format='PNG')
-                        img_bytes = img_io.getvalue()
-                    except TypeError:
-                        try:
-                            img_io = BytesIO()
-                            img_obj.save(img_io)
-                            img_bytes = img_io.getvalue()
-                        except Exception:
-                            # Try common attribute names that may contain raw bytes
-                            for attr in ('content', 'image_bytes', 'data', 'bytes'):
-                                val = getattr(img_obj, attr, None)
-                                if isinstance(val, (bytes, bytearray)):
-                                    img_bytes = bytes(val)
-                                    break
-
-                if not img_bytes:
-                    raise Exception('Unable to extract image bytes from SDK response')
-
-                image_base64 = base64.b64encode(img_bytes).decode('utf-8')
-
-                print(f"    ✓ Image generated successfully")
-                return image_base64
-            else:
-                raise Exception("No images generated in response")
 
+            # Encode in the pool so other panels' responses keep being received
+            loop = asyncio.get_running_loop()
+            image_base64 = await loop.run_in_executor(self._encode_pool,
+                                                      self._encode_imagen_response, response)
+            self._image_cache.put(key, image_base64)
+            return image_base64
+
+        except _ImagenUnavailableError:
+            raise
         except Exception as e:
-            error_msg = str(e)
-            if "billed users" in error_msg.lower() or "billing" in error_msg.lower():
-                print(f"    ℹ Imagen API requires billing to be enabled")
-                print(f"    ℹ Using high-quality placeholder instead")
-            else:
-                print(f"    Imagen generation failed: {e}")
+            self._report_imagen_error(e)
             raise
 
+    def _enhance_image_prompt(self, prompt: str) -> str:
+        """Add the comic book style to an image generation prompt."""
+        return f"Comic book art style with bold outlines and vibrant colors. {prompt}"
+
+    def _image_cache_key(self, enhanced_prompt: str) -> bytes:
+        """Build the image cache key from everything that determines the generated image."""
+        return _cache_key(self.image_model_name, self.image_aspect_ratio, enhanced_prompt)
+
+    def _image_generation_config(self) -> types.GenerateImagesConfig:
+        """Return the Imagen configuration used for every panel."""
+        return types.GenerateImagesConfig(
+            number_of_images=1,
+            aspect_ratio=self.image_aspect_ratio,
+        )
+
+    def _encode_imagen_response(self, response) -> str:
+        """
+        Extract the first generated image from an Imagen response.
+
+        Args:
+            response: The generate_images response
+
+        Returns:
+            Base64 encoded image data
+        """
+        if response.generated_images and len(response.generated_images) > 0:
+            # Get the first generated image
+            generated_image = response.generated_images[0]
+
+            img_bytes = _extract_image_bytes(generated_image.image)
+
+            image_base64 = base64.b64encode(img_bytes).decode('ascii')
+
+            print(f"    ✓ Image generated successfully")
+            return image_base64
+        else:
+            raise Exception("No images generated in response")
+
+    def _check_image_generation_available(self) -> None:
+        """
+        Refuse to call Imagen once it has reported that billing is required.
+
+        Raises:
+            _ImagenUnavailableError: If image generation has been disabled
+        """
+        if not self.image_generation_available:
+            raise _ImagenUnavailableError()
+
+    def _report_imagen_error(self, error: Exception) -> None:
+        """Print why an Imagen request failed, and stop calling Imagen if billing is required."""
+        if _is_billing_error(error):
+            # Every later request would fail the same way, so go straight to placeholders
+            self.image_generation_available = False
+            print(f"    ℹ Imagen API requires billing to be enabled")
+            print(f"    ℹ Using high-quality placeholder instead")
+        else:
+            print(f"    Imagen generation failed: {error}")
+
+    def _run_async(self, coro):
+        """Run a coroutine on the generator's event loop and wait for the result."""
+        return self._submit_async(coro).result()
+
+    def _submit_async(self, coro) -> Future:
+        """
+        Schedule a coroutine on the generator's event loop.
+
+        The async Gemini client keeps its connections bound to the event loop it
+        first ran on, so all coroutines share one long-lived loop thread instead
+        of each call creating a new loop with asyncio.run().
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever,
+                                                     name='comic-generator-loop', daemon=True)
+                self._loop_thread.start()
+
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def close(self) -> None:
+        """Release the generator's connections, event loop thread and worker threads."""
+        self.client.close()
+        self._run_async(self._async_http.aclose())
+
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+            self._image_semaphore = None
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+        self._encode_pool.shutdown()
+
+    def __enter__(self) -> 'StoryToComicGenerator':
+        """Use the generator as a context manager that closes it on exit."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Close the generator."""
+        self.close()
+
+    @classmethod
+    def _get_fonts(cls):
+        """
+        Load the placeholder image fonts on first use.
+
+        Returns:
+            Tuple of (large font for the panel number, medium font for scene text)
+        """
+        if cls._font_medium is None:
+            try:
+                # Try to use a nice font
+                font_large = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial Bold.ttf", 32)
+                font_medium = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial.ttf", 16)
+            except OSError:
+                # Fall back to default font
+                font_large = ImageFont.load_default()
+                font_medium = ImageFont.load_default()
+
+            # Set the medium font last, since it is what the check above looks at
+            cls._font_large = font_large
+            cls._font_medium = font_medium
+
+        return cls._font_large, cls._font_medium
+
     def _create_placeholder_image(self, panel: ComicPanel, width: int = 512, height: int = 384) -> str:
         """
         Create a placeholder image with the scene description.
@@ -376,17 +949,12 @@ Please create engaging, visually descriptive comic panels that capture the key m
         Returns:
             Base64 encoded image data
         """
-        # Create a colorful gradient background
-        img = Image.new('RGB', (width, height), color='white')
-        draw = ImageDraw.Draw(img)
-
-        # Draw gradient background
-        for y in range(height):
-            # Create a gradient from purple to blue
-            r = int(102 + (118 - 102) * (y / height))
-            g = int(126 + (187 - 126) * (y / height))
-            b = int(241 + (162 - 241) * (y / height))
-            draw.line([(0, y), (width, y)], fill=(r, g, b))
+        # Create a colorful gradient background from purple to blue: compute one
+        # color per row as a 1-pixel-wide column, then stretch it to full width
+        t = (np.arange(height, dtype=np.float64) / height)[:, None]
+        row_colors = (_GRADIENT_TOP + (_GRADIENT_BOTTOM - _GRADIENT_TOP) * t).astype(np.uint8)
+        img = Image.fromarray(row_colors[:, None, :], 'RGB').resize((width, height), Image.NEAREST)
+        draw = ImageDraw.Draw(img, 'RGB')
 
         # Add panel number badge
         badge_size = 60
@@ -394,42 +962,43 @@ Please create engaging, visually descriptive comic panels that capture the key m
                     fill='#6366f1', outline='white', width=4)
 
         # Draw panel number
-        try:
-            # Try to use a nice font
-            font_large = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial Bold.ttf", 32)
-            font_medium = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial.ttf", 16)
-        except:
-            # Fall back to default font
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
+        font_large, font_medium = self._get_fonts()
 
         number_text = str(panel.panel_number)
-        # Center the number in the badge
-        bbox = draw.textbbox((0, 0), number_text, font=font_large)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
+        # Center the number in the badge, measuring each number only once
+        text_size = self._badge_text_sizes.get(number_text)
+        if text_size is None:
+            bbox = font_large.getbbox(number_text)
+            text_size = self._badge_text_sizes.setdefault(number_text, (bbox[2] - bbox[0], bbox[3] - bbox[1]))
+        text_width, text_height = text_size
         number_x = 20 + (badge_size - text_width) // 2
         number_y = 20 + (badge_size - text_height) // 2
+        # The badge number is large and bold, so skip anti-aliasing for it
+        draw.fontmode = '1'
         draw.text((number_x, number_y), number_text, fill='white', font=font_large)
+        draw.fontmode = 'L'
 
         # Draw scene description with word wrap
         scene_text = panel.scene if len(panel.scene) <= 200 else panel.scene[:197] + "..."
 
-        # Word wrap the text
+        # Word wrap the text, measuring each word once and adding up the widths
         words = scene_text.split()
         lines = []
         current_line = []
+        current_width = 0
         max_width = width - 40
+        space_width = font_medium.getlength(' ')
 
         for word in words:
-            test_line = ' '.join(current_line + [word])
-            bbox = draw.textbbox((0, 0), test_line, font=font_medium)
-            if bbox[2] - bbox[0] <= max_width:
+            word_width = font_medium.getlength(word)
+            line_width = current_width + space_width + word_width if current_line else word_width
+            if line_width <= max_width or not current_line:
                 current_line.append(word)
+                current_width = line_width
             else:
-                if current_line:
-                    lines.append(' '.join(current_line))
+                lines.append(' '.join(current_line))
                 current_line = [word]
+                current_width = word_width
 
         if current_line:
             lines.append(' '.join(current_line))
@@ -446,12 +1015,13 @@ Please create engaging, visually descriptive comic panels that capture the key m
         text_y = box_y + 10
         for line in lines:
             draw.text((20, text_y), line, fill='#1f2937', font=font_medium)
-            text_y += 18
+            text_y += self._line_height
 
-        # Convert to base64
+        # Convert to base64. Placeholders only need to display, so use the
+        # fastest zlib level rather than the smallest file.
         buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        img_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
+        img.save(buffered, format="PNG", compress_level=1, optimize=False)
+        img_base64 = base64.b64encode(buffered.getbuffer()).decode('ascii')
 
         return img_base64
 
@@ -468,16 +1038,12 @@ Please create engaging, visually descriptive comic panels that capture the key m
         """
         panels = self.generate_comic(story, max_panels)
 
-        output = "=" * 60 + "\n"
-        output += "COMIC STRIP\n"
-        output += "=" * 60 + "\n\n"
-
-        for panel in panels:
-            output += str(panel) + "\n\n"
-
-        output += "=" * 60
+        rule = "=" * 60
+        sections = [f"{rule}\nCOMIC STRIP\n{rule}"]
+        sections.extend(str(panel) for panel in panels)
+        sections.append(rule)
 
-        return output
+        return '\n\n'.join(sections)
 
     def generate_comic_dict(self, story: str, max_panels: int = 10) -> List[Dict]:
         """
@@ -507,5 +1073,5 @@ def story_to_comic(story: str, api_key: Optional[str] = None, max_panels: int =
     Returns:
         Formatted string representation of the comic strip
     """
-    generator = StoryToComicGenerator(api_key=api_key)
-    return generator.generate_comic_text(story, max_panels)
+    with StoryToComicGenerator(api_key=api_key) as generator:
+        return generator.generate_comic_text(story, max_panels)
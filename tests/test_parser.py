@@ -0,0 +1,212 @@
+"""
+Tests for parsing Gemini responses into comic panels.
+
+The single-pass parser is checked against the regex parser it replaced, and
+the streaming buffer is checked by feeding responses in chunks of several sizes.
+
+Run with: python -m unittest discover tests
+"""
+
+import os
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from story_to_comic import StoryToComicGenerator, _PanelStreamBuffer
+
+# Chunk sizes to feed the streaming buffer with. 13 characters is smaller than
+# the marker rescan overlap, so markers get split across several chunks.
+CHUNK_SIZES = (1, 2, 5, 13)
+
+PLAIN_RESPONSE = """Here is your comic strip:
+
+PANEL 1
+SCENE: A small village at dawn, mist over the rooftops
+IMAGE_PROMPT: A quiet medieval village at sunrise,
+soft mist drifting between thatched roofs
+DIALOGUE:
+- Baker: Another early morning.
+* Cat: Meow.
+NARRATION: The day begins like any other.
+
+PANEL 2
+SCENE: The baker opens the shop door
+IMAGE_PROMPT: A baker in an apron opening a wooden door
+DIALOGUE:
+- Baker: Who left this here?
+
+PANEL 3
+SCENE: A mysterious box sits on the doorstep
+IMAGE_PROMPT: A glowing wooden box on a stone doorstep
+NARRATION: Nothing would be the same again.
+"""
+
+# Plain sections whose first line is much longer than the rescan overlap
+LONG_RESPONSE = ''.join(
+    f"PANEL {i}\n"
+    f"SCENE: {'A very long scene description that keeps going ' * 3}{i}\n"
+    f"IMAGE_PROMPT: Prompt number {i}\n"
+    f"DIALOGUE:\n- Hero: Line {i}\n"
+    for i in range(1, 13)
+)
+
+MARKDOWN_RESPONSE = """**PANEL 1**
+**SCENE:** A knight on a hill
+**IMAGE_PROMPT:** A knight in silver armor on a green hill
+**DIALOGUE:**
+- Knight: The dragon is near.
+
+## PANEL 2:
+## SCENE: A dragon in the clouds
+NARRATION: It had been waiting.
+"""
+
+SAME_LINE_RESPONSE = """PANEL 1: SCENE: A knight on a hill
+IMAGE_PROMPT: A knight on a hill at dusk
+PANEL 2 - NARRATION: Night falls.
+"""
+
+MID_LINE_RESPONSE = """PANEL 1
+SCENE: A sign that reads PANEL 7 hangs over the door
+DIALOGUE:
+- Guard: See the PANEL 9 notice?
+PANEL 2
+SCENE: The hall inside
+"""
+
+
+def _regex_parse(response_text):
+    """Parse a response the way the original regex parser did, as plain tuples."""
+    panels = []
+    panel_sections = re.split(r'PANEL\s+(\d+)', response_text)
+
+    for i in range(1, len(panel_sections), 2):
+        if i + 1 >= len(panel_sections):
+            break
+
+        panel_num = int(panel_sections[i])
+        panel_content = panel_sections[i + 1]
+
+        scene_match = re.search(r'SCENE:\s*(.+?)(?:\n|$)', panel_content, re.IGNORECASE)
+        scene = scene_match.group(1).strip() if scene_match else "Unknown scene"
+
+        image_prompt_match = re.search(
+            r'IMAGE_PROMPT:\s*(.+?)(?=DIALOGUE:|NARRATION:|PANEL|\Z)',
+            panel_content,
+            re.IGNORECASE | re.DOTALL
+        )
+        image_prompt = image_prompt_match.group(1).strip() if image_prompt_match else scene
+
+        dialogue_section = re.search(
+            r'DIALOGUE:\s*(.+?)(?=NARRATION:|PANEL|\Z)',
+            panel_content,
+            re.IGNORECASE | re.DOTALL
+        )
+
+        dialogues = []
+        if dialogue_section:
+            for line in dialogue_section.group(1).strip().split('\n'):
+                line = line.strip()
+                if line and (line.startswith('-') or line.startswith('*')):
+                    dialogue = line[1:].strip()
+                    if dialogue:
+                        dialogues.append(dialogue)
+
+        narration_match = re.search(r'NARRATION:\s*(.+?)(?:\n|PANEL|\Z)', panel_content, re.IGNORECASE)
+        narration = narration_match.group(1).strip() if narration_match else None
+
+        panels.append((panel_num, scene, dialogues, narration, image_prompt))
+
+    return panels
+
+
+def _as_tuples(panels):
+    """Reduce parsed ComicPanel objects to comparable tuples."""
+    return [(p.panel_number, p.scene, p.dialogue, p.narration, p.image_prompt) for p in panels]
+
+
+class ParserTest(unittest.TestCase):
+    """Tests for StoryToComicGenerator._parse_comic_response and _PanelStreamBuffer."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.generator = StoryToComicGenerator(api_key='test-key')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.generator.close()
+
+    def parse(self, text):
+        return _as_tuples(self.generator._parse_comic_response(text))
+
+    def parse_streamed(self, text, chunk_size):
+        """Feed text through the streaming buffer and parse each completed section."""
+        buffer = _PanelStreamBuffer()
+        panels = []
+        for start in range(0, len(text), chunk_size):
+            panels += self.generator._parse_comic_response(buffer.feed(text[start:start + chunk_size]))
+        panels += self.generator._parse_comic_response(buffer.close())
+        return _as_tuples(panels)
+
+    def test_matches_regex_parser(self):
+        for text in (PLAIN_RESPONSE, LONG_RESPONSE):
+            self.assertEqual(self.parse(text), _regex_parse(text))
+
+    def test_plain_response(self):
+        panels = self.parse(PLAIN_RESPONSE)
+        self.assertEqual([p[0] for p in panels], [1, 2, 3])
+        self.assertEqual(panels[0], (
+            1,
+            'A small village at dawn, mist over the rooftops',
+            ['Baker: Another early morning.', 'Cat: Meow.'],
+            'The day begins like any other.',
+            'A quiet medieval village at sunrise,\nsoft mist drifting between thatched roofs'
+        ))
+        # A panel without an image prompt falls back to its scene
+        self.assertEqual(panels[2][2], [])
+        self.assertEqual(panels[1][3], None)
+
+    def test_markdown_markers_and_headers(self):
+        self.assertEqual(self.parse(MARKDOWN_RESPONSE), [
+            (1, 'A knight on a hill', ['Knight: The dragon is near.'], None,
+             'A knight in silver armor on a green hill'),
+            (2, 'A dragon in the clouds', [], 'It had been waiting.', 'A dragon in the clouds')
+        ])
+
+    def test_text_after_marker_is_kept(self):
+        self.assertEqual(self.parse(SAME_LINE_RESPONSE), [
+            (1, 'A knight on a hill', [], None, 'A knight on a hill at dusk'),
+            (2, 'Unknown scene', [], 'Night falls.', 'Unknown scene')
+        ])
+
+    def test_mid_line_marker_does_not_split(self):
+        panels = self.parse(MID_LINE_RESPONSE)
+        self.assertEqual([p[0] for p in panels], [1, 2])
+        self.assertEqual(panels[0][1], 'A sign that reads PANEL 7 hangs over the door')
+        self.assertEqual(panels[0][2], ['Guard: See the PANEL 9 notice?'])
+
+    def test_without_image_prompts(self):
+        panels = self.generator._parse_comic_response(PLAIN_RESPONSE, include_image_prompt=False)
+        self.assertEqual([p.image_prompt for p in panels], [None, None, None])
+        self.assertEqual(_as_tuples(panels)[0][:4], self.parse(PLAIN_RESPONSE)[0][:4])
+
+    def test_streamed_chunks_match_whole_text(self):
+        for text in (PLAIN_RESPONSE, LONG_RESPONSE, MARKDOWN_RESPONSE, SAME_LINE_RESPONSE, MID_LINE_RESPONSE):
+            expected = self.parse(text)
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(text=text[:20], chunk_size=chunk_size):
+                    self.assertEqual(self.parse_streamed(text, chunk_size), expected)
+
+    def test_buffer_only_returns_complete_panels(self):
+        buffer = _PanelStreamBuffer()
+        self.assertEqual(buffer.feed('PANEL 1\nSCENE: A hill\n'), '')
+        self.assertEqual(buffer.feed('PANEL 2\nSCE'), 'PANEL 1\nSCENE: A hill\n')
+        # A PANEL marker in the middle of a line does not complete a panel
+        self.assertEqual(buffer.feed('NE: See PANEL 3 here\n'), '')
+        self.assertEqual(buffer.close(), 'PANEL 2\nSCENE: See PANEL 3 here\n')
+
+
+if __name__ == '__main__':
+    unittest.main()